@@ -0,0 +1,167 @@
+"""
+Este modulo contiene los kernels numéricos de distancias geográficas.
+Las funciones son puramente escalares/vectoriales para que Numba (si está
+instalado) las compile a código nativo.
+
+@author: Juan Pablo Ortiz Rubio
+@version: 1.0.1
+
+"""
+
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    # Sin Numba los kernels se ejecutan como Python puro
+    def njit(*args, **kwargs):
+        def decorador(func):
+            return func
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return decorador
+
+    prange = range
+
+# Radio medio de la Tierra en kilómetros
+RADIO_TIERRA_KM = 6371.0088
+
+
+@njit(cache=True, fastmath=True)
+def haversine_km(lat1, lng1, lat2, lng2):
+    """ Retorna la distancia haversine en kilometros entre dos puntos.
+        Es una aproximación esférica de la geodesica, con un error inferior
+        al 0.5 %, pero decenas de veces más rápida que el cálculo exacto.
+
+    Args:
+        lat1 (float): Latitud del primer punto.
+        lng1 (float): Longitud del primer punto.
+        lat2 (float): Latitud del segundo punto.
+        lng2 (float): Longitud del segundo punto.
+
+    Returns:
+        float: Distancia haversine en kilometros entre los puntos dados.
+    """
+    rlat1 = math.radians(lat1)
+    rlat2 = math.radians(lat2)
+    dlat = math.radians(lat2 - lat1)
+    dlng = math.radians(lng2 - lng1)
+
+    a = math.sin(dlat / 2.0) ** 2 + \
+        math.cos(rlat1) * math.cos(rlat2) * math.sin(dlng / 2.0) ** 2
+
+    return 2.0 * RADIO_TIERRA_KM * math.asin(math.sqrt(a))
+
+@njit(cache=True, fastmath=True, parallel=True)
+def haversine_km_batch(lat1, lng1, lat2, lng2):
+    """ Versión por lotes de haversine_km sobre arreglos NumPy 1-D.
+        Con Numba el bucle se reparte entre los núcleos disponibles.
+
+    Args:
+        lat1 (np.ndarray): Latitudes de los primeros puntos.
+        lng1 (np.ndarray): Longitudes de los primeros puntos.
+        lat2 (np.ndarray): Latitudes de los segundos puntos.
+        lng2 (np.ndarray): Longitudes de los segundos puntos.
+
+    Returns:
+        np.ndarray: Distancias haversine en kilometros, punto a punto.
+    """
+    n = lat1.shape[0]
+    resultado = np.empty(n, dtype=np.float64)
+    for i in prange(n):
+        resultado[i] = haversine_km(lat1[i], lng1[i], lat2[i], lng2[i])
+    return resultado
+
+@njit(cache=True, fastmath=True)
+def _nn_order_kernel(coords):
+    """ Kernel vecino más cercano sobre coordenadas (N, 2).
+        Recorrido greedy: desde el punto actual se salta siempre al punto
+        no visitado más cercano. Con Numba el doble bucle N² se compila a
+        código nativo, decenas de veces más rápido que Python puro.
+
+    Args:
+        coords (np.ndarray): Arreglo (N, 2) de latitudes y longitudes.
+
+    Returns:
+        np.ndarray: Índices en el orden de visita, empezando por el 0.
+    """
+    n = coords.shape[0]
+    orden = np.empty(n, dtype=np.int64)
+    visitado = np.zeros(n, dtype=np.uint8)
+
+    actual = 0
+    orden[0] = 0
+    visitado[0] = 1
+
+    for i in range(1, n):
+        mejor = -1
+        mejor_dist = 1e18
+        for j in range(n):
+            if visitado[j] == 0:
+                d = haversine_km(coords[actual, 0], coords[actual, 1],
+                                 coords[j, 0], coords[j, 1])
+                if d < mejor_dist:
+                    mejor_dist = d
+                    mejor = j
+        orden[i] = mejor
+        visitado[mejor] = 1
+        actual = mejor
+
+    return orden
+
+def nn_order(points):
+    """ Retorna el orden de visita vecino más cercano de los puntos dados.
+        Es una heurística: no garantiza el orden óptimo, pero para N de
+        decenas a cientos de puntos da un recorrido corto en milisegundos.
+
+    Args:
+        points (np.ndarray): Arreglo de forma (N, 2) con latitudes y longitudes.
+
+    Raises:
+        ImportError: Si NumPy no está instalado.
+
+    Returns:
+        np.ndarray: Índices de los puntos en el orden de visita.
+    """
+    if np is None:
+        raise ImportError(
+            'Se requiere NumPy para el ordenamiento de paradas')
+
+    points = np.asarray(points, dtype=np.float64)
+    return _nn_order_kernel(points)
+
+def pairwise_km(points):
+    """ Retorna la matriz N×N de distancias haversine en kilometros entre
+        todos los pares de puntos dados. Se calcula con broadcasting de
+        NumPy en una sola pasada vectorizada, en vez de un doble bucle de
+        Python sobre cada par.
+
+    Args:
+        points (np.ndarray): Arreglo de forma (N, 2) con latitudes y longitudes.
+
+    Raises:
+        ImportError: Si NumPy no está instalado.
+
+    Returns:
+        np.ndarray: Matriz (N, N) de distancias en kilometros.
+    """
+    if np is None:
+        raise ImportError(
+            'Se requiere NumPy para la matriz de distancias')
+
+    points = np.asarray(points, dtype=np.float64)
+    lat = np.deg2rad(points[:, 0])[:, None]
+    lng = np.deg2rad(points[:, 1])[:, None]
+
+    dlat = lat - lat.T
+    dlng = lng - lng.T
+
+    a = np.sin(dlat / 2.0) ** 2 + \
+        np.cos(lat) * np.cos(lat.T) * np.sin(dlng / 2.0) ** 2
+
+    return 2.0 * RADIO_TIERRA_KM * np.arcsin(np.sqrt(a))
@@ -6,26 +6,203 @@ Este modulo contiene funciones para facilitar el trabajo con la api de bing maps
 
 """
 
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import os
+import weakref
+from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from urllib.parse import quote as _urlquote
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from _geo_kernels import haversine_km, nn_order, pairwise_km
+
 try:
-    import urllib.parse
-    from urllib import urlencode
+    import numpy as np
 except ImportError:
-    from urllib.parse import urlencode
+    np = None
 
 try:
-    import json
+    import orjson
 except ImportError:
-    import simplejson as json
+    orjson = None
 
-import json
-from abc import ABCMeta, abstractmethod
-from pathlib import Path
+try:
+    from tenacity import (retry, retry_if_exception_type, stop_after_attempt,
+                          wait_exponential)
+    # Reintentos con espera exponencial solo para errores transitorios de
+    # red; reraise=True relanza la excepción original agotados los intentos
+    # para que los except estrechos de las clases la conviertan en ValueError
+    _reintento_rest = retry(stop=stop_after_attempt(3),
+                            wait=wait_exponential(),
+                            reraise=True,
+                            retry=retry_if_exception_type(
+                                requests.RequestException))
+except ImportError:
+    # Sin tenacity las llamadas REST se hacen sin reintentos
+    def _reintento_rest(func):
+        return func
+
+try:
+    from numba import njit
+except ImportError:
+    # Sin Numba las funciones decoradas se ejecutan como Python puro
+    def njit(*args, **kwargs):
+        def decorador(func):
+            return func
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return decorador
+
+# Logger del módulo para registrar los errores REST originales
+_LOG = logging.getLogger(__name__)
+
+# Con BING_CACHE=0 se desactivan todas las cachés de respuestas (la sesión
+# HTTP cacheada y la caché JSON del módulo) para obtener respuestas frescas
+_CACHE_ACTIVA = os.environ.get('BING_CACHE', '1') != '0'
+
+def _crear_sesion():
+    """ Crea la sesión HTTP compartida del módulo.
+        Si requests_cache está instalado, las respuestas se persisten en
+        ~/.cache/maps-service/bing_maps.sqlite durante 24 horas, por lo que
+        las consultas repetidas entre procesos no tocan la red. La variable
+        de entorno BING_CACHE=0 desactiva esta caché y la caché JSON del
+        módulo para obtener respuestas frescas.
+
+    Returns:
+        requests.Session: Sesión HTTP (cacheada si es posible).
+    """
+    if _CACHE_ACTIVA:
+        try:
+            import requests_cache
+            cache_dir = Path.home() / '.cache' / 'maps-service'
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            session = requests_cache.CachedSession(
+                str(cache_dir / 'bing_maps'),
+                backend='sqlite', expire_after=86400)
+        except ImportError:
+            session = requests.Session()
+    else:
+        session = requests.Session()
+
+    # Pool de conexiones con reintentos exponenciales a nivel de transporte:
+    # el keep-alive amortiza el handshake TCP+TLS entre llamadas y los 429 y
+    # 5xx de Bing se reintentan con espera creciente
+    adapter = HTTPAdapter(
+        pool_connections=32, pool_maxsize=32,
+        max_retries=Retry(total=3, backoff_factor=0.3,
+                          status_forcelist=[429, 500, 502, 503, 504]))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+# Sesión HTTP compartida con keep-alive. Todos los servicios REST apuntan al
+# mismo host (dev.virtualearth.net), por lo que reutilizar la conexión evita
+# el handshake TCP+TLS en cada llamada.
+_SESSION = _crear_sesion()
+
+# Traductor compartido del módulo (se crea perezosamente en _get_translator)
+_TRANSLATOR = None
+
+
+def _get_translator():
+    """ Obtiene (creando la primera vez) el traductor compartido del módulo.
+        Reutilizar un solo cliente evita construir uno nuevo por cada
+        indicación a traducir.
+
+    Returns:
+        Translator: Traductor compartido de googletrans.
+    """
+    global _TRANSLATOR
+    if _TRANSLATOR is None:
+        # Importación perezosa: googletrans solo se paga al traducir
+        from googletrans import Translator
+        _TRANSLATOR = Translator()
+    return _TRANSLATOR
+
+# Caché de respuestas JSON por consulta. Si diskcache está disponible la
+# caché persiste entre procesos; si no, se usa un diccionario en memoria
+# que solo dura la sesión actual.
+try:
+    import diskcache
+    _CACHE = diskcache.Cache(str(Path.home() / '.cache' / 'maps-service'))
+except ImportError:
+    _CACHE = {}
+
+
+def _cache_get(key):
+    """ Obtiene un valor de la caché de respuestas.
+
+    Args:
+        key (String): Clave de la consulta.
+
+    Returns:
+        JSON: Respuesta cacheada, o None si no existe o la caché está
+            desactivada con BING_CACHE=0.
+    """
+    if not _CACHE_ACTIVA:
+        return None
+    return _CACHE.get(key)
+
+def _cache_set(key, val):
+    """ Guarda un valor en la caché de respuestas.
+        En la caché de disco las entradas expiran a las 24 horas para no
+        reproducir indefinidamente una respuesta vieja.
+
+    Args:
+        key (String): Clave de la consulta.
+        val (JSON): Respuesta a cachear.
+    """
+    if not _CACHE_ACTIVA:
+        return
+    if isinstance(_CACHE, dict):
+        _CACHE[key] = val
+    else:
+        _CACHE.set(key, val, expire=86400)
+
+def _clave_cache(endpoint, ubicacion, kwargs):
+    """ Construye la clave de caché de una consulta REST a partir del
+        endpoint, la ubicación y los parámetros. La clave de la API se
+        excluye para que la caché sobreviva a un cambio de api_key.
+
+    Args:
+        endpoint (String): URL base del servicio consultado.
+        ubicacion ((lat, lang) o String): Ubicación consultada.
+        kwargs (dict): Parámetros de la consulta.
+
+    Returns:
+        String: Clave sha1 de la consulta.
+    """
+    params = sorted((k, str(v)) for k, v in kwargs.items() if k != 'key')
+    crudo = endpoint + '|' + str(ubicacion) + '|' + str(params)
+    return hashlib.sha1(crudo.encode('utf-8')).hexdigest()
+
+
+@njit(cache=True)
+def _validate_latlng(lat, lng):
+    """ Valida que la latitud y longitud estén dentro de los rangos válidos.
+        La validación es puramente numérica, por lo que Numba (si está
+        instalado) la compila a código nativo para los bucles calientes.
 
-from geopy.distance import geodesic
-from geopy.geocoders import Bing, Nominatim
-from googletrans import Translator
-from IPython.display import Image
+    Args:
+        lat (float): Latitud a validar.
+        lng (float): Longitud a validar.
 
+    Raises:
+        ValueError: Si la latitud o longitud no son válidas.
+    """
+    if lat > 90.0 or lat < -90.0:
+        raise ValueError('Latitud inválida')
+    if lng > 180.0 or lng < -180.0:
+        raise ValueError('Longitud inválida')
 
 def _tuple_LatLng_to_string(latlng):
     """ Se verifica que el parámetro latlng sea una tupla de dos elementos
@@ -45,44 +222,134 @@ def _tuple_LatLng_to_string(latlng):
     lat = latlng[0]
     lng = latlng[1]
 
-    if lat > 90 or lat < -90:
+    _validate_latlng(lat, lng)
+    return f"{lat},{lng}"
+
+def _batch_LatLng_to_strings(arr):
+    """ Versión por lotes de _tuple_LatLng_to_string para arreglos NumPy.
+        Se validan todas las latitudes y longitudes en una sola pasada
+        vectorizada en vez de una comparación de Python por cada punto.
+
+    Args:
+        arr (np.ndarray): Arreglo de forma (N, 2) con latitudes y longitudes.
+
+    Raises:
+        ImportError: Si NumPy no está instalado.
+        ValueError: Si alguna latitud o longitud no es válida.
+
+    Returns:
+        list<String>: Lista de cadenas con el formato 'lat,lng'.
+    """
+    if np is None:
+        raise ImportError(
+            'Se requiere NumPy para el procesamiento por lotes')
+
+    arr = np.asarray(arr, dtype=np.float64)
+    if arr.ndim != 2 or arr.shape[1] != 2:
+        raise ValueError('El arreglo debe tener forma (N, 2)')
+
+    if arr[:, 0].min() < -90 or arr[:, 0].max() > 90:
         raise ValueError('Latitud inválida')
-    elif lng > 180 or lng < -180:
+    if arr[:, 1].min() < -180 or arr[:, 1].max() > 180:
         raise ValueError('Longitud inválida')
-    else:
-        return str(lat) + ',' + str(lng)
 
-def _json_from_url(url):
+    return [f"{lat},{lng}" for lat, lng in arr.tolist()]
+
+def _json_from_url(url, session=None, cache_key=None):
     """ Se obtiene una cadena JSON a partir de la respuesta de una URL.
+        Las respuestas se cachean por consulta: una consulta repetida se
+        responde desde la caché sin tocar la red.
 
     Args:
         url (String): URL de la que se obtendrá la respuesta.
+        session (requests.Session, optional): Sesión HTTP a utilizar.
+            Defaults to None (se usa la sesión compartida del módulo).
+        cache_key (String, optional): Clave de caché de la consulta.
+            Defaults to None (se calcula a partir de la URL completa).
 
     Returns:
         JSON: Cadena JSON obtenida de la respuesta de la URL.
     """
-    request = urllib.request.Request(url)
-    response = urllib.request.urlopen(request)
+    if session is None:
+        session = _SESSION
+    if cache_key is None:
+        cache_key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    # Si la consulta ya fue respondida antes, se devuelve desde la caché
+    cacheado = _cache_get(cache_key)
+    if cacheado is not None:
+        return cacheado
+
+    # Se parsean los bytes crudos de la respuesta en una sola pasada; con
+    # orjson instalado el parseo es varias veces más rápido que el json de
+    # la librería estándar en las respuestas grandes de rutas
+    response = session.get(url, timeout=30)
+    # Los errores HTTP (credenciales inválidas, parámetros mal formados)
+    # se lanzan antes de parsear para no cachear cuerpos de error
+    response.raise_for_status()
+    if orjson is not None:
+        data = orjson.loads(response.content)
+    else:
+        data = json.loads(response.content)
+    _cache_set(cache_key, data)
+    return data
 
-    r = response.read().decode(encoding="utf-8")
-    return json.loads(r)
+def _descargar_imagen(url, filename, session=None):
+    """ Descarga una imagen de una URL y la guarda en un archivo.
+        Se usa la sesión compartida para reutilizar la conexión al servidor.
 
-def _posicion_a_string_url(ubicacion):
-    """ Convierte cualquer tipo de ubicación a una string.
+    Args:
+        url (String): URL de la imagen a descargar.
+        filename (String): Ruta del archivo donde se guardará la imagen.
+        session (requests.Session, optional): Sesión HTTP a utilizar.
+            Defaults to None (se usa la sesión compartida del módulo).
+    """
+    if session is None:
+        session = _SESSION
+
+    # Si la imagen ya fue descargada antes, no se vuelve a pedir
+    if Path(filename).exists():
+        return
+
+    # Se descarga por bloques grandes (64 KB) sobre un búfer de escritura de
+    # 1 MB para reducir el número de llamadas al sistema por imagen
+    with session.get(url, stream=True, timeout=60) as r:
+        r.raise_for_status()
+        with open(filename, 'wb', buffering=1 << 20) as f:
+            for chunk in r.iter_content(chunk_size=1 << 16):
+                f.write(chunk)
+
+@functools.lru_cache(maxsize=4096)
+def _posicion_a_string_url_cacheada(ubicacion):
+    """ Versión cacheada de _posicion_a_string_url. Solo recibe valores
+        hasheables (tuplas o cadenas), por lo que la validación y el formato
+        de una misma ubicación se pagan una sola vez por sesión.
 
     Args:
-        posicion ((lat, lang) o String): Ubicación a convertir. 
+        ubicacion ((lat, lang) o String): Ubicación a convertir.
 
     Returns:
         String: Ubicación en formato String
     """
     # Si la posición es una tupla, es una latitud y longitud
-    if type(ubicacion) is tuple or type(ubicacion) is list:
+    if isinstance(ubicacion, tuple):
         return _tuple_LatLng_to_string(ubicacion)
     # Si la posición es una cadena, es una dirección
-    if type(ubicacion) is str:
-        encodedDest = ubicacion  # urllib.parse.quote(posicion, safe='')
-        return encodedDest
+    return ubicacion  # urllib.parse.quote(posicion, safe='')
+
+def _posicion_a_string_url(ubicacion):
+    """ Convierte cualquer tipo de ubicación a una string.
+
+    Args:
+        posicion ((lat, lang) o String): Ubicación a convertir.
+
+    Returns:
+        String: Ubicación en formato String
+    """
+    # Las listas se convierten a tuplas para que sean hasheables en la caché
+    if isinstance(ubicacion, list):
+        ubicacion = tuple(ubicacion)
+    return _posicion_a_string_url_cacheada(ubicacion)
 
 class MapService(metaclass=ABCMeta):
     @abstractmethod
@@ -101,6 +368,68 @@ class MapService(metaclass=ABCMeta):
     def _rest_ruta_imagen(self, inicio, final, via=[], width=500, height=500, **kwargs):
         pass
 
+    def _obtener_aclient(self):
+        """ Obtiene (creando la primera vez) el cliente HTTP asíncrono del servicio.
+            Un solo cliente multiplexa todas las consultas sobre conexiones
+            persistentes, amortizando el handshake TCP+TLS entre llamadas.
+
+        Returns:
+            httpx.AsyncClient: Cliente HTTP asíncrono del servicio.
+        """
+        if getattr(self, '_aclient', None) is None:
+            # Importación perezosa: httpx solo se paga al usar la API asíncrona
+            import httpx
+            self._aclient = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=100,
+                                    max_keepalive_connections=20))
+        return self._aclient
+
+    async def batch_localizacion(self, ubicaciones, **kwargs):
+        """ Procesa en paralelo la localización de una lista de ubicaciones.
+            Todas las consultas REST se lanzan concurrentemente sobre el mismo
+            cliente asíncrono, por lo que el tiempo total se acerca al de una
+            sola consulta en vez de crecer linealmente con la lista.
+
+        Args:
+            ubicaciones (list<(lat, lang) o String>): Lista de ubicaciones a localizar.
+            **kwargs: Los posibles kwargs de _rest_localizacion_async.
+
+        Returns:
+            list<JSON>: Lista de respuestas JSON, en el mismo orden de entrada.
+        """
+        # Si todas las ubicaciones son pares de coordenadas y NumPy está
+        # disponible, se validan y formatean a 'lat,lng' en una sola pasada
+        # vectorizada (ver _batch_LatLng_to_strings) en vez de una
+        # comprobación de Python por cada punto
+        if np is not None and len(ubicaciones) > 0 and all(
+                isinstance(ubicacion, (tuple, list))
+                for ubicacion in ubicaciones):
+            ubicaciones = _batch_LatLng_to_strings(ubicaciones)
+
+        return await asyncio.gather(
+            *[self._rest_localizacion_async(ubicacion, **kwargs)
+              for ubicacion in ubicaciones])
+
+    def batch_localizacion_imagen(self, ubicaciones, max_workers=16, **kwargs):
+        """ Descarga en paralelo las imágenes de una lista de ubicaciones.
+            Cada descarga está limitada por la red, por lo que un grupo de
+            hilos compartiendo la sesión con pool de conexiones escala el
+            rendimiento casi linealmente hasta el límite de Bing Maps.
+
+        Args:
+            ubicaciones (list<(lat, lang) o String>): Lista de ubicaciones.
+            max_workers (int, optional): Número máximo de hilos. Defaults to 16.
+            **kwargs: Los posibles kwargs de _rest_localizacion_imagen.
+
+        Returns:
+            list<Image>: Lista de imágenes, en el mismo orden de entrada.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(
+                lambda ubicacion: self._rest_localizacion_imagen(
+                    ubicacion, **kwargs),
+                ubicaciones))
+
 
 class OpenService(MapService):
     ################################################################################
@@ -119,20 +448,42 @@ class OpenService(MapService):
         """
         # Inicialización de los datos y objetos
         # configure api
+        # Importación perezosa: geopy solo se paga si se usa OpenService
+        from geopy.geocoders import Nominatim
+
         self.geolocator = Nominatim(user_agent=api_open_key)
         self._api_key = api_bingmaps_key
         self._version = version
 
+        # Sesión HTTP con pool de conexiones (inyectable en pruebas)
+        self._session = _SESSION
+
+        # Cliente HTTP asíncrono (se crea perezosamente en _obtener_aclient)
+        self._aclient = None
+
+        # Directorio donde se guardan las imágenes descargadas (se crea una
+        # sola vez aquí en vez de en cada llamada)
+        self._images_dir = Path("images")
+        self._images_dir.mkdir(parents=True, exist_ok=True)
+
+        # Cola fija de las consultas de imágenes: la clave de la API y el dpi
+        # no cambian entre llamadas, así que se codifican una sola vez
+        self._tail_img = '&' + urlencode({'key': self._api_key, 'dpi': 'Large'})
+
         # Inicialización de las constantes
-        URL_BASE = 'http://dev.virtualearth.net/REST/v' + str(version) + '/'
-        self._url_rutas = URL_BASE + 'Routes/Driving'
-        self._url_rutas_imagen = URL_BASE + 'Imagery/Map/Road/Routes/Driving'
+        URL_BASE = f'http://dev.virtualearth.net/REST/v{version}/'
+        # Las URL de rutas y de búsqueda por query ya incluyen el '?' final
+        # para ahorrar una concatenación en cada llamada
+        self._url_rutas = URL_BASE + 'Routes/Driving?'
+        self._url_rutas_imagen = URL_BASE + 'Imagery/Map/Road/Routes/Driving?'
         self._url_localizacion = URL_BASE + 'Locations'
+        self._url_localizacion_q = URL_BASE + 'Locations?'
         self._url_localizacion_imagen = URL_BASE + 'Imagery/Map/Road'
 
     ################################################################################
     ############################### SERVICIOS REST #################################
     ################################################################################
+    @_reintento_rest
     def _rest_localizacion(self, ubicacion, **kwargs):
         """ Búsqueda de localización de OpenStreet.
 
@@ -144,11 +495,13 @@ class OpenService(MapService):
             JSON: JSON con la respuesta del servicio REST de Localización de OpenStreet.
         """
 
+        # Se calcula una sola vez si la ubicación es una latitud y longitud
+        es_coordenadas = isinstance(ubicacion, (tuple, list))
+
         # Si se ingresa una longitud y latitud.
-        if type(ubicacion) is tuple or type(ubicacion) is list:
+        if es_coordenadas:
             res = self.geolocator.reverse(ubicacion)
-
-        elif type(ubicacion) is str:
+        else:
             res = self.geolocator.geocode(ubicacion)
 
         if res is None:
@@ -157,39 +510,73 @@ class OpenService(MapService):
             # Se agrega la clave de la API Bing Maps
             kwargs.update({'key': self._api_key})
 
-            url = self._url_localizacion
-
             # Si se ingresa una longitud y latitud.
-            if type(ubicacion) is tuple or type(ubicacion) is list:
+            if es_coordenadas:
                 # Ejemplo de llamada:
                 # http://dev.virtualearth.net/REST/v1/Locations?query=Bogot%C3%A1%2C+Colombia%2C+Carrear+111c+%2381-30&key=AiHmbkSxeJrOk9uYeGh6Rue2DCZeAe3Ozk2zwmct5b-GvXxvqpbP-UqAWqqQb47J
 
-                url += '?'
-
                 # Se agregan en los parámetros el query de la búsqueda
                 kwargs.update({'query': ubicacion})
 
-            elif type(ubicacion) is str:
+                url = self._url_localizacion_q + urlencode(kwargs)
+            else:
                 # Ejemplo de llamada:
                 # https://dev.virtualearth.net/REST/v1/Locations/4.695128,-74.086825?&key=AiHmbkSxeJrOk9uYeGh6Rue2DCZeAe3Ozk2zwmct5b-GvXxvqpbP-UqAWqqQb47J
 
-                # Se agrega el valor obligatorio a enviar
-                url += '/' + urllib.parse.quote(ubicacion) + '?'
+                # La URL se construye en una sola pasada
+                url = f"{self._url_localizacion}/{_urlquote(ubicacion)}?{urlencode(kwargs)}"
 
-            # Se agrega a la consulta todos los parámetros kwargs
-            url += urlencode(kwargs)
 
             # Se hace la consulta al servicio REST
-            data = _json_from_url(url)
+            data = _json_from_url(url, self._session,
+                                  _clave_cache(self._url_localizacion, ubicacion, kwargs))
 
             # Se devuelve el resultado de la consulta en formato JSON (MAP)
             return data['resourceSets'][0]['resources'][0]
             
         else:
-            proc = '{"point": {"coordinates": [' + str(res.latitude) + ', ' + str(
-                res.longitude) + ']}, "address": {"formattedAddress": "' + res.address + '"} }'
+            # Se construye el diccionario directamente, sin serializar a JSON
+            # y volver a parsearlo (además no se rompe si la dirección
+            # contiene comillas)
+            return {"point": {"coordinates": [res.latitude, res.longitude]},
+                    "address": {"formattedAddress": res.address}}
+
+    async def _rest_localizacion_async(self, ubicacion, **kwargs):
+        """ Versión asíncrona de la búsqueda de localización.
+            Consulta directamente los servicios de Bing Maps (Nominatim no
+            ofrece cliente asíncrono), por lo que requiere api_bingmaps_key.
+            Pensada para lanzarse en paralelo mediante batch_localizacion.
+
+        Args:
+            ubicacion ((lat, lang) o String): Latitud y longitud o Dirección de la ubicación dada.
+            **kwargs: Los posibles kwargs.
+
+        Returns:
+            JSON: JSON con la respuesta del servicio REST de Localización de Bing Maps.
+        """
+        # Se agrega la clave de la API Bing Maps
+        kwargs.update({'key': self._api_key})
+
+        # Se calcula una sola vez si la ubicación es una latitud y longitud
+        es_coordenadas = isinstance(ubicacion, (tuple, list))
+
+        # Si se ingresa una longitud y latitud.
+        if es_coordenadas:
+            # Se agregan en los parámetros el query de la búsqueda
+            kwargs.update({'query': ubicacion})
+
+            url = self._url_localizacion_q + urlencode(kwargs)
+        else:
+            # La URL se construye en una sola pasada
+            url = f"{self._url_localizacion}/{_urlquote(ubicacion)}?{urlencode(kwargs)}"
+
+
+        # Se hace la consulta al servicio REST de forma asíncrona
+        response = await self._obtener_aclient().get(url)
+        data = response.json()
 
-            return json.loads(proc)
+        # Se devuelve el resultado de la consulta en formato JSON (MAP)
+        return data['resourceSets'][0]['resources'][0]
 
     def _rest_ruta(self, inicio, final, via=[], **kwargs):
         """ Búsqueda de rutas de Bing Maps.
@@ -220,26 +607,23 @@ class OpenService(MapService):
         # Se guarda el número de paradas totales (contando inicio y fin)
         numero_paradas = len(paradas)
 
-        # Se transforma las direcciones y paradas en datos validos para la consulta al servicio REST
-        viajes = {}
-        for n, wp in zip(range(1, numero_paradas + 1), paradas):
-            if n == 1 or n == numero_paradas:
-                viajes['wayPoint.' + str(n)] = wp
-            else:
-                viajes['viaWayPoint.' + str(n)] = wp
+        # Se transforma las direcciones y paradas en datos validos para la consulta al servicio REST.
+        # Los extremos se asignan fuera del bucle para no evaluar la condición
+        # en cada parada intermedia.
+        viajes = {'wayPoint.1': paradas[0],
+                  f'wayPoint.{numero_paradas}': paradas[-1]}
+        viajes.update({f'viaWayPoint.{n}': wp
+                       for n, wp in enumerate(paradas[1:-1], 2)})
 
-        # Se agrega a los parámetros kwargs las ubicaciones
-        kwargs.update(viajes)
-
-        # Se agrega la clave de la API Bing Maps
-        kwargs.update({'key': self._api_key})
+        # Se agregan las ubicaciones y la clave de la API Bing Maps en una
+        # sola actualización
+        kwargs.update({**viajes, 'key': self._api_key})
 
         # Se crea y se agregan a la consulta todos los parámetros extra
-        url = self._url_rutas + '?'
-        url += urlencode(kwargs)
+        url = self._url_rutas + urlencode(kwargs)
 
         # Se hace la consulta al servicio REST
-        data = _json_from_url(url)
+        data = _json_from_url(url, self._session)
 
         # Se devuelve el resultado de la consulta en formato JSON (MAP)
         return data['resourceSets'][0]['resources'][0]
@@ -260,40 +644,35 @@ class OpenService(MapService):
             Image: Imagen de la ubicación.
         """
 
-        # Se agrega la clave de la API Bing Maps
-        kwargs.update({'key': self._api_key})
-
-        # Se agregan los parámetros a la consulta REST
-        kwargs.update({'zoomLevel': zoomLevel})
-        kwargs.update({'dpi': "Large"})
-        kwargs.update({'mapSize': str(width) + ',' + str(height)})
+        # Solo se agregan los parámetros variables de la imagen; la clave de
+        # la API y el dpi ya están codificados en la cola fija del servicio
+        kwargs = {**kwargs, 'zoomLevel': zoomLevel,
+                  'mapSize': f'{width},{height}'}
 
-        url = self._url_localizacion_imagen
+        # Se calcula una sola vez si la ubicación es una latitud y longitud
+        es_coordenadas = isinstance(ubicacion, (tuple, list))
 
         # Si se ingresa una longitud y latitud.
-        if type(ubicacion) is tuple or type(ubicacion) is list:
-            # Se agrega el valor obligatorio a enviar
-            url += '/' + _tuple_LatLng_to_string(ubicacion) + '?'
-
+        if es_coordenadas:
             # Para poder agregar un pin en la ubicación
             kwargs.update(
                 {'pushpin': _tuple_LatLng_to_string(ubicacion) + ';66'})
 
-        elif type(ubicacion) is str:
-            # Se agrega el valor obligatorio a enviar
-            url += '/' + ubicacion + '?'
+            # La URL se construye en una sola pasada
+            url = f"{self._url_localizacion_imagen}/{_tuple_LatLng_to_string(ubicacion)}?{urlencode(kwargs)}{self._tail_img}"
+        else:
+            # La URL se construye en una sola pasada
+            url = f"{self._url_localizacion_imagen}/{ubicacion}?{urlencode(kwargs)}{self._tail_img}"
+
 
-        # Se agrega a la consulta todos los parámetros kwargs
-        url += urlencode(kwargs)
+        # Se organiza el nombre del archivo de la imagen de la ubicación
+        filename = self._images_dir / f'localizacion({_posicion_a_string_url(ubicacion)}).png'
 
-        # Se organiza el directorio para guardar la imagen de la ubicación
-        path = Path("images")
-        path.mkdir(parents=True, exist_ok=True)
-        filename = 'images/localizacion(' + \
-            _posicion_a_string_url(ubicacion) + ').png'
+        # Importación perezosa: IPython solo se necesita para mostrar imágenes
+        from IPython.display import Image
 
         # Se hace la consulta al servicio REST y se guarda la imagen
-        urllib.request.urlretrieve(url, filename)
+        _descargar_imagen(url, filename, self._session)
         return Image(filename=filename)
 
     def _rest_ruta_imagen(self, inicio, final, via=[], width=500, height=500, **kwargs):
@@ -327,36 +706,29 @@ class OpenService(MapService):
         # Se guarda el número de paradas totales (contando inicio y fin)
         numero_paradas = len(paradas)
 
-        # Se transforma las direcciones y paradas en datos validos para la consulta al servicio REST
-        viajes = {}
-        for n, wp in zip(range(1, numero_paradas + 1), paradas):
-            if n == 1 or n == numero_paradas:
-                viajes['wayPoint.' + str(n)] = wp
-            else:
-                viajes['viaWayPoint.' + str(n)] = wp
-
-        # Se agrega a los parámetros kwargs las ubicaciones
-        kwargs.update(viajes)
-
-        # Se agrega la clave de la API Bing Maps
-        kwargs.update({'key': self._api_key})
+        # Se transforma las direcciones y paradas en datos validos para la consulta al servicio REST.
+        # Los extremos se asignan fuera del bucle para no evaluar la condición
+        # en cada parada intermedia.
+        viajes = {'wayPoint.1': paradas[0],
+                  f'wayPoint.{numero_paradas}': paradas[-1]}
+        viajes.update({f'viaWayPoint.{n}': wp
+                       for n, wp in enumerate(paradas[1:-1], 2)})
 
-        # Se agregan los parámetros de la imagen
-        kwargs.update({'mapSize': str(width) + ',' + str(height)})
-        kwargs.update({'dpi': "Large"})
+        # Se agregan las ubicaciones y los parámetros variables de la imagen;
+        # la clave de la API y el dpi ya están en la cola fija del servicio
+        kwargs.update({**viajes, 'mapSize': f'{width},{height}'})
 
         # Se crea y se agregan a la consulta todos los parámetros extra
-        url = self._url_rutas_imagen + '?'
-        url += urlencode(kwargs)
+        url = self._url_rutas_imagen + urlencode(kwargs) + self._tail_img
 
-        # Se organiza el directorio para guardar la imagen de la ubicación
-        path = Path("images")
-        path.mkdir(parents=True, exist_ok=True)
-        filename = 'images/Ruta(' + _posicion_a_string_url(inicio) + \
-            ')(' + _posicion_a_string_url(final) + ').png'
+        # Se organiza el nombre del archivo de la imagen de la ruta
+        filename = self._images_dir / f'Ruta({_posicion_a_string_url(inicio)})({_posicion_a_string_url(final)}).png'
+
+        # Importación perezosa: IPython solo se necesita para mostrar imágenes
+        from IPython.display import Image
 
         # Se hace la consulta al servicio REST y se guarda la imagen
-        urllib.request.urlretrieve(url, filename)
+        _descargar_imagen(url, filename, self._session)
         return Image(filename=filename)
 
 
@@ -378,17 +750,36 @@ class BingService(MapService):
         self._api_key = api_bingmaps_key
         self._version = version
 
+        # Sesión HTTP con pool de conexiones (inyectable en pruebas)
+        self._session = _SESSION
+
+        # Cliente HTTP asíncrono (se crea perezosamente en _obtener_aclient)
+        self._aclient = None
+
+        # Directorio donde se guardan las imágenes descargadas (se crea una
+        # sola vez aquí en vez de en cada llamada)
+        self._images_dir = Path("images")
+        self._images_dir.mkdir(parents=True, exist_ok=True)
+
+        # Cola fija de las consultas de imágenes: la clave de la API y el dpi
+        # no cambian entre llamadas, así que se codifican una sola vez
+        self._tail_img = '&' + urlencode({'key': self._api_key, 'dpi': 'Large'})
+
         # Inicialización de las constantes
-        URL_BASE = 'http://dev.virtualearth.net/REST/v' + str(version) + '/'
-        self._url_rutas = URL_BASE + 'Routes/Driving'
-        self._url_rutas_imagen = URL_BASE + 'Imagery/Map/Road/Routes/Driving'
+        URL_BASE = f'http://dev.virtualearth.net/REST/v{version}/'
+        # Las URL de rutas y de búsqueda por query ya incluyen el '?' final
+        # para ahorrar una concatenación en cada llamada
+        self._url_rutas = URL_BASE + 'Routes/Driving?'
+        self._url_rutas_imagen = URL_BASE + 'Imagery/Map/Road/Routes/Driving?'
         self._url_localizacion = URL_BASE + 'Locations'
+        self._url_localizacion_q = URL_BASE + 'Locations?'
         self._url_localizacion_imagen = URL_BASE + 'Imagery/Map/Road'
 
     ################################################################################
     ############################### SERVICIOS REST #################################
     ################################################################################
 
+    @_reintento_rest
     def _rest_localizacion(self, ubicacion, **kwargs):
         """ Búsqueda de localización de Bing Maps.
             Diccionario de parámetros requeridos: {'query': 'search'} o {'point': 'lat,lng'}
@@ -407,30 +798,64 @@ class BingService(MapService):
         # Se agrega la clave de la API Bing Maps
         kwargs.update({'key': self._api_key})
 
-        url = self._url_localizacion
+        # Se calcula una sola vez si la ubicación es una latitud y longitud
+        es_coordenadas = isinstance(ubicacion, (tuple, list))
 
         # Si se ingresa una longitud y latitud.
-        if type(ubicacion) is tuple or type(ubicacion) is list:
+        if es_coordenadas:
             # Ejemplo de llamada:
             # http://dev.virtualearth.net/REST/v1/Locations?query=Bogot%C3%A1%2C+Colombia%2C+Carrear+111c+%2381-30&key=AiHmbkSxeJrOk9uYeGh6Rue2DCZeAe3Ozk2zwmct5b-GvXxvqpbP-UqAWqqQb47J
 
-            url += '?'
-
             # Se agregan en los parámetros el query de la búsqueda
             kwargs.update({'query': ubicacion})
 
-        elif type(ubicacion) is str:
+            url = self._url_localizacion_q + urlencode(kwargs)
+        else:
             # Ejemplo de llamada:
             # https://dev.virtualearth.net/REST/v1/Locations/4.695128,-74.086825?&key=AiHmbkSxeJrOk9uYeGh6Rue2DCZeAe3Ozk2zwmct5b-GvXxvqpbP-UqAWqqQb47J
 
-            # Se agrega el valor obligatorio a enviar
-            url += '/' + urllib.parse.quote(ubicacion) + '?'
+            # La URL se construye en una sola pasada
+            url = f"{self._url_localizacion}/{_urlquote(ubicacion)}?{urlencode(kwargs)}"
 
-        # Se agrega a la consulta todos los parámetros kwargs
-        url += urlencode(kwargs)
 
         # Se hace la consulta al servicio REST
-        data = _json_from_url(url)
+        data = _json_from_url(url, self._session,
+                              _clave_cache(self._url_localizacion, ubicacion, kwargs))
+
+        # Se devuelve el resultado de la consulta en formato JSON (MAP)
+        return data['resourceSets'][0]['resources'][0]
+
+    async def _rest_localizacion_async(self, ubicacion, **kwargs):
+        """ Versión asíncrona de la búsqueda de localización de Bing Maps.
+            Pensada para lanzarse en paralelo mediante batch_localizacion.
+
+        Args:
+            ubicacion ((lat, lang) o String): Latitud y longitud o Dirección de la ubicación dada.
+            **kwargs: Los posibles kwargs.
+
+        Returns:
+            JSON: JSON con la respuesta del servicio REST de Localización de Bing Maps.
+        """
+        # Se agrega la clave de la API Bing Maps
+        kwargs.update({'key': self._api_key})
+
+        # Se calcula una sola vez si la ubicación es una latitud y longitud
+        es_coordenadas = isinstance(ubicacion, (tuple, list))
+
+        # Si se ingresa una longitud y latitud.
+        if es_coordenadas:
+            # Se agregan en los parámetros el query de la búsqueda
+            kwargs.update({'query': ubicacion})
+
+            url = self._url_localizacion_q + urlencode(kwargs)
+        else:
+            # La URL se construye en una sola pasada
+            url = f"{self._url_localizacion}/{_urlquote(ubicacion)}?{urlencode(kwargs)}"
+
+
+        # Se hace la consulta al servicio REST de forma asíncrona
+        response = await self._obtener_aclient().get(url)
+        data = response.json()
 
         # Se devuelve el resultado de la consulta en formato JSON (MAP)
         return data['resourceSets'][0]['resources'][0]
@@ -464,26 +889,23 @@ class BingService(MapService):
         # Se guarda el número de paradas totales (contando inicio y fin)
         numero_paradas = len(paradas)
 
-        # Se transforma las direcciones y paradas en datos validos para la consulta al servicio REST
-        viajes = {}
-        for n, wp in zip(range(1, numero_paradas + 1), paradas):
-            if n == 1 or n == numero_paradas:
-                viajes['wayPoint.' + str(n)] = wp
-            else:
-                viajes['viaWayPoint.' + str(n)] = wp
-
-        # Se agrega a los parámetros kwargs las ubicaciones
-        kwargs.update(viajes)
+        # Se transforma las direcciones y paradas en datos validos para la consulta al servicio REST.
+        # Los extremos se asignan fuera del bucle para no evaluar la condición
+        # en cada parada intermedia.
+        viajes = {'wayPoint.1': paradas[0],
+                  f'wayPoint.{numero_paradas}': paradas[-1]}
+        viajes.update({f'viaWayPoint.{n}': wp
+                       for n, wp in enumerate(paradas[1:-1], 2)})
 
-        # Se agrega la clave de la API Bing Maps
-        kwargs.update({'key': self._api_key})
+        # Se agregan las ubicaciones y la clave de la API Bing Maps en una
+        # sola actualización
+        kwargs.update({**viajes, 'key': self._api_key})
 
         # Se crea y se agregan a la consulta todos los parámetros extra
-        url = self._url_rutas + '?'
-        url += urlencode(kwargs)
+        url = self._url_rutas + urlencode(kwargs)
 
         # Se hace la consulta al servicio REST
-        data = _json_from_url(url)
+        data = _json_from_url(url, self._session)
 
         # Se devuelve el resultado de la consulta en formato JSON (MAP)
         return data['resourceSets'][0]['resources'][0]
@@ -504,40 +926,35 @@ class BingService(MapService):
             Image: Imagen de la ubicación.
         """
 
-        # Se agrega la clave de la API Bing Maps
-        kwargs.update({'key': self._api_key})
-
-        # Se agregan los parámetros a la consulta REST
-        kwargs.update({'zoomLevel': zoomLevel})
-        kwargs.update({'dpi': "Large"})
-        kwargs.update({'mapSize': str(width) + ',' + str(height)})
+        # Solo se agregan los parámetros variables de la imagen; la clave de
+        # la API y el dpi ya están codificados en la cola fija del servicio
+        kwargs = {**kwargs, 'zoomLevel': zoomLevel,
+                  'mapSize': f'{width},{height}'}
 
-        url = self._url_localizacion_imagen
+        # Se calcula una sola vez si la ubicación es una latitud y longitud
+        es_coordenadas = isinstance(ubicacion, (tuple, list))
 
         # Si se ingresa una longitud y latitud.
-        if type(ubicacion) is tuple or type(ubicacion) is list:
-            # Se agrega el valor obligatorio a enviar
-            url += '/' + _tuple_LatLng_to_string(ubicacion) + '?'
-
+        if es_coordenadas:
             # Para poder agregar un pin en la ubicación
             kwargs.update(
                 {'pushpin': _tuple_LatLng_to_string(ubicacion) + ';66'})
 
-        elif type(ubicacion) is str:
-            # Se agrega el valor obligatorio a enviar
-            url += '/' + ubicacion + '?'
+            # La URL se construye en una sola pasada
+            url = f"{self._url_localizacion_imagen}/{_tuple_LatLng_to_string(ubicacion)}?{urlencode(kwargs)}{self._tail_img}"
+        else:
+            # La URL se construye en una sola pasada
+            url = f"{self._url_localizacion_imagen}/{ubicacion}?{urlencode(kwargs)}{self._tail_img}"
+
 
-        # Se agrega a la consulta todos los parámetros kwargs
-        url += urlencode(kwargs)
+        # Se organiza el nombre del archivo de la imagen de la ubicación
+        filename = self._images_dir / f'localizacion({_posicion_a_string_url(ubicacion)}).png'
 
-        # Se organiza el directorio para guardar la imagen de la ubicación
-        path = Path("images")
-        path.mkdir(parents=True, exist_ok=True)
-        filename = 'images/localizacion(' + \
-            _posicion_a_string_url(ubicacion) + ').png'
+        # Importación perezosa: IPython solo se necesita para mostrar imágenes
+        from IPython.display import Image
 
         # Se hace la consulta al servicio REST y se guarda la imagen
-        urllib.request.urlretrieve(url, filename)
+        _descargar_imagen(url, filename, self._session)
         return Image(filename=filename)
 
     def _rest_ruta_imagen(self, inicio, final, via=[], width=500, height=500, **kwargs):
@@ -571,44 +988,140 @@ class BingService(MapService):
         # Se guarda el número de paradas totales (contando inicio y fin)
         numero_paradas = len(paradas)
 
-        # Se transforma las direcciones y paradas en datos validos para la consulta al servicio REST
-        viajes = {}
-        for n, wp in zip(range(1, numero_paradas + 1), paradas):
-            if n == 1 or n == numero_paradas:
-                viajes['wayPoint.' + str(n)] = wp
-            else:
-                viajes['viaWayPoint.' + str(n)] = wp
-
-        # Se agrega a los parámetros kwargs las ubicaciones
-        kwargs.update(viajes)
+        # Se transforma las direcciones y paradas en datos validos para la consulta al servicio REST.
+        # Los extremos se asignan fuera del bucle para no evaluar la condición
+        # en cada parada intermedia.
+        viajes = {'wayPoint.1': paradas[0],
+                  f'wayPoint.{numero_paradas}': paradas[-1]}
+        viajes.update({f'viaWayPoint.{n}': wp
+                       for n, wp in enumerate(paradas[1:-1], 2)})
 
-        # Se agrega la clave de la API Bing Maps
-        kwargs.update({'key': self._api_key})
-
-        # Se agregan los parámetros de la imagen
-        kwargs.update({'mapSize': str(width) + ',' + str(height)})
-        kwargs.update({'dpi': "Large"})
+        # Se agregan las ubicaciones y los parámetros variables de la imagen;
+        # la clave de la API y el dpi ya están en la cola fija del servicio
+        kwargs.update({**viajes, 'mapSize': f'{width},{height}'})
 
         # Se crea y se agregan a la consulta todos los parámetros extra
-        url = self._url_rutas_imagen + '?'
-        url += urlencode(kwargs)
+        url = self._url_rutas_imagen + urlencode(kwargs) + self._tail_img
+
+        # Se organiza el nombre del archivo de la imagen de la ruta
+        filename = self._images_dir / f'Ruta({_posicion_a_string_url(inicio)})({_posicion_a_string_url(final)}).png'
 
-        # Se organiza el directorio para guardar la imagen de la ubicación
-        path = Path("images")
-        path.mkdir(parents=True, exist_ok=True)
-        filename = 'images/Ruta(' + _posicion_a_string_url(inicio) + \
-            ')(' + _posicion_a_string_url(final) + ').png'
+        # Importación perezosa: IPython solo se necesita para mostrar imágenes
+        from IPython.display import Image
 
         # Se hace la consulta al servicio REST y se guarda la imagen
-        urllib.request.urlretrieve(url, filename)
+        _descargar_imagen(url, filename, self._session)
         return Image(filename=filename)
 
 
+################################################################################
+############################ CACHÉ DE SERVICIOS REST ###########################
+################################################################################
+
+def _congelar_posicion(posicion):
+    """ Convierte una posición (lista, tupla o cadena) en un valor hasheable.
+
+    Args:
+        posicion ((lat, lang) o String): Posición a congelar.
+
+    Returns:
+        Tupla o String: Posición en formato hasheable.
+    """
+    return tuple(posicion) if isinstance(posicion, list) else posicion
+
+def _congelar_kwargs(kwargs):
+    """ Convierte un diccionario de kwargs en una tupla ordenada hasheable.
+
+    Args:
+        kwargs (dict): Diccionario de parámetros.
+
+    Returns:
+        Tupla: Tupla ordenada de pares (clave, valor).
+    """
+    return tuple(sorted(kwargs.items()))
+
+@functools.lru_cache(maxsize=512)
+def _cached_rest_ruta(service_ref, inicio, final, paradas, kwargs_items):
+    """ Wrapper cacheado de MapService._rest_ruta. Una misma ruta consultada
+        varias veces en la sesión se responde desde la memoria sin repetir
+        la llamada REST. El servicio se recibe como weakref para que la
+        caché no lo mantenga vivo.
+
+    Args:
+        service_ref (weakref.ref): Referencia débil al servicio de mapas.
+        inicio ('lat, lng' o String): Ubicación inicial (hasheable).
+        final ('lat, lng' o String): Ubicación final (hasheable).
+        paradas (Tupla): Tupla de ubicaciones intermedias (hasheables).
+        kwargs_items (Tupla): Kwargs congelados con _congelar_kwargs.
+
+    Returns:
+        JSON: JSON con la respuesta del servicio REST de Rutas.
+    """
+    service = service_ref()
+    if service is None:
+        raise ValueError('El servicio de mapas ya no existe')
+    return service._rest_ruta(inicio, final, list(paradas),
+                              **dict(kwargs_items))
+
+@functools.lru_cache(maxsize=512)
+def _cached_rest_ruta_imagen(service_ref, inicio, final, paradas, kwargs_items):
+    """ Wrapper cacheado de MapService._rest_ruta_imagen. Misma mecánica que
+        _cached_rest_ruta.
+
+    Args:
+        service_ref (weakref.ref): Referencia débil al servicio de mapas.
+        inicio ('lat, lng' o String): Ubicación inicial (hasheable).
+        final ('lat, lng' o String): Ubicación final (hasheable).
+        paradas (Tupla): Tupla de ubicaciones intermedias (hasheables).
+        kwargs_items (Tupla): Kwargs congelados con _congelar_kwargs.
+
+    Returns:
+        Image: Imagen de la ruta.
+    """
+    service = service_ref()
+    if service is None:
+        raise ValueError('El servicio de mapas ya no existe')
+    return service._rest_ruta_imagen(inicio, final, list(paradas),
+                                     **dict(kwargs_items))
+
+@functools.lru_cache(maxsize=512)
+def _cached_rest_localizacion_imagen(service_ref, ubicacion, kwargs_items):
+    """ Wrapper cacheado de MapService._rest_localizacion_imagen. Misma
+        mecánica que _cached_rest_ruta.
+
+    Args:
+        service_ref (weakref.ref): Referencia débil al servicio de mapas.
+        ubicacion ((lat, lang) o String): Ubicación (hasheable).
+        kwargs_items (Tupla): Kwargs congelados con _congelar_kwargs.
+
+    Returns:
+        Image: Imagen de la ubicación.
+    """
+    service = service_ref()
+    if service is None:
+        raise ValueError('El servicio de mapas ya no existe')
+    return service._rest_localizacion_imagen(ubicacion, **dict(kwargs_items))
+
+
+# Estados del ciclo de vida de Localizacion y Ruta: crudo, con datos y
+# con datos e imagen. Un solo entero reemplaza el par de banderas
+# booleanas y los chequeos calientes quedan en una sola comparación
+_ST_RAW, _ST_DATA, _ST_IMG = 0, 1, 2
+
+
 class Localizacion(object):
-    """ 
+    """
     Clase que representa una localización geográfica.
     """
 
+    # Sin __dict__ por instancia: las cargas de trabajo que crean miles de
+    # localizaciones (matrices de distancias, búsqueda de rutas) usan ~3x
+    # menos memoria y los accesos a atributos son cargas de slot en C
+    __slots__ = ('_map_service', '_kwargs', 'data',
+                 '_lat', '_lng', '_latlng', '_direccion',
+                 '_latlng_recibido', '_direccion_recibida',
+                 '_state', '_imagen')
+
     def __init__(self, map_service, latlng=None, direccion=None, **kwargs):
         """ Inicializa una localización geográfica.
             Si se ingresa una dirección recomendable escribir con el siguiente formato:
@@ -623,8 +1136,7 @@ class Localizacion(object):
             ValueError: Cuando no es correcto alguno de los valores ingresados
         """
 
-        self._data_procesada = False
-        self._imagen_procesada = False
+        self._state = _ST_RAW
         self._latlng_recibido = False
         self._direccion_recibida = False
 
@@ -638,7 +1150,7 @@ class Localizacion(object):
             self._direccion_recibida = True
         else:
             if latlng is not None:
-                if type(latlng) is tuple or type(latlng) is list:
+                if isinstance(latlng, (tuple, list)):
                     self._lat = latlng[0]
                     self._lng = latlng[1]
                     self._latlng = latlng
@@ -647,7 +1159,7 @@ class Localizacion(object):
                     raise ValueError(
                         'La latitud y longitud deben ser una tupla o lista')
             elif direccion is not None:
-                if type(direccion) is str:
+                if isinstance(direccion, str):
                     self._direccion = direccion
                     self._direccion_recibida = True
                 else:
@@ -660,6 +1172,24 @@ class Localizacion(object):
         self._kwargs = kwargs
         self._map_service = map_service
 
+    @property
+    def _data_procesada(self):
+        """ Compatibilidad con el par de banderas anterior.
+
+        Returns:
+            bool: True si los datos ya fueron procesados.
+        """
+        return self._state >= _ST_DATA
+
+    @property
+    def _imagen_procesada(self):
+        """ Compatibilidad con el par de banderas anterior.
+
+        Returns:
+            bool: True si la imagen ya fue procesada.
+        """
+        return self._state >= _ST_IMG
+
     def procesar(self):
         """ Procesa los datos de la localización.
 
@@ -669,7 +1199,7 @@ class Localizacion(object):
         Returns:
             JSON: JSON con los datos de la localización.
         """
-        if self._data_procesada:
+        if self._state >= _ST_DATA:
             raise ValueError('La localización ya ha sido procesada')
         if self._latlng_recibido and self._direccion_recibida:
             raise ValueError('No es necesario procesar la ubicación')
@@ -679,18 +1209,22 @@ class Localizacion(object):
                 try:
                     self.data = self._map_service._rest_localizacion(
                         self._direccion, **self._kwargs)
-                    self._data_procesada = True
-                except:
-                    raise ValueError('Error, al procesar REST')
+                    self._state = _ST_DATA
+                except (requests.RequestException, KeyError, IndexError,
+                        ValueError) as e:
+                    _LOG.exception('Error al procesar REST')
+                    raise ValueError(f'Error al procesar REST: {e}') from e
 
             elif self._latlng is not None:
 
                 try:
                     self.data = self._map_service._rest_localizacion(
                         self._latlng, **self._kwargs)
-                    self._data_procesada = True
-                except:
-                    raise ValueError('Error, al procesar REST')
+                    self._state = _ST_DATA
+                except (requests.RequestException, KeyError, IndexError,
+                        ValueError) as e:
+                    _LOG.exception('Error al procesar REST')
+                    raise ValueError(f'Error al procesar REST: {e}') from e
 
             else:
                 raise ValueError(
@@ -700,29 +1234,44 @@ class Localizacion(object):
 
     def obtener_latlng(self):
         """ Obtiene la latitud y longitud de la localización.
+            El resultado se cachea en la instancia, por lo que las llamadas
+            repetidas (comprensiones de paradas, cálculos de distancias)
+            devuelven la tupla ya resuelta sin reevaluar los datos.
 
         Returns:
             Tupla: Tupla con la latitud y longitud de la localización.
         """
         if self._latlng_recibido:
             return self._latlng
-        else:
-            if not self._data_procesada:
-                self.procesar()
-            return tuple(self.data['point']['coordinates'])
+
+        # Si la latitud y longitud ya fueron resueltas, se devuelven directo
+        if self._latlng is not None:
+            return self._latlng
+
+        if self._state < _ST_DATA:
+            self.procesar()
+        self._latlng = tuple(self.data['point']['coordinates'])
+        return self._latlng
 
     def obtener_direccion(self):
         """ Obtiene la dirección de la localización.
+            El resultado se cachea en la instancia, igual que en
+            obtener_latlng.
 
         Returns:
             String: Dirección de la localización.
         """
         if self._direccion_recibida:
             return self._direccion
-        else:
-            if not self._data_procesada:
-                self.procesar()
-            return self.data['address']['formattedAddress']
+
+        # Si la dirección ya fue resuelta, se devuelve directo
+        if self._direccion is not None:
+            return self._direccion
+
+        if self._state < _ST_DATA:
+            self.procesar()
+        self._direccion = self.data['address']['formattedAddress']
+        return self._direccion
 
     def obtener_imagen(self, **kwargs):
         """ Obtiene la imagen de la localización.
@@ -735,29 +1284,39 @@ class Localizacion(object):
         Returns:
             String: URL de la imagen de la localización.
         """
-        if self._imagen_procesada:
+        if self._state >= _ST_IMG:
             return self._imagen
         else:
-            if not self._data_procesada:
+            if self._state < _ST_DATA:
                 self.procesar()
 
             latlng = self.obtener_latlng()
 
             try:
-                self._imagen = self._map_service._rest_localizacion_imagen(
-                    latlng, **kwargs)
-                self._imagen_procesada = True
+                self._imagen = _cached_rest_localizacion_imagen(
+                    weakref.ref(self._map_service),
+                    _congelar_posicion(latlng),
+                    _congelar_kwargs(kwargs))
+                self._state = _ST_IMG
                 return self._imagen
-            except:
-                raise ValueError('Error, al procesar REST')
+            except (requests.RequestException, KeyError, IndexError,
+                    ValueError) as e:
+                _LOG.exception('Error al procesar REST')
+                raise ValueError(f'Error al procesar REST: {e}') from e
 
 
 class Ruta(object):
-    """ 
+    """
     Clase que representa una ruta.
     """
 
-    def __init__(self, map_service, inicio, final, paradas=[], **kwargs):
+    # Sin __dict__ por instancia, por las mismas razones que Localizacion
+    __slots__ = ('_map_service', '_kwargs', 'data',
+                 '_inicio', '_final', '_paradas', '_paradas_coords',
+                 '_state', '_imagen',
+                 '_indicaciones', '_travel_km')
+
+    def __init__(self, map_service, inicio, final, paradas=(), **kwargs):
         """ Inicializa una ruta.
             Las localizaciones dadas son recomendables que ya hayan sido procesadas.
 
@@ -765,34 +1324,88 @@ class Ruta(object):
             map_service (MapService): Objeto MapService con el servicio de mapas de Bing Maps.
             inicio (Localizacion): Localización de inicio de la ruta.
             final (Localizacion): Localización de final de la ruta.
-            paradas (list<Localizacion>, optional): Lista de localizaciones intermedias. Defaults to [].
+            paradas (list<Localizacion>, optional): Lista de localizaciones intermedias. Defaults to ().
 
         Raises:
             ValueError: Si hay alguna verificación fallida.
         """
 
-        self._data_procesada = False
-        self._imagen_procesada = False
-        self._paradas = None
-
-        if type(inicio) is Localizacion:
-            self._inicio = inicio
-        else:
-            raise ValueError('El inicio debe ser una localización')
-
-        if type(final) is Localizacion:
-            self._final = final
+        self._state = _ST_RAW
+        self._indicaciones = None
+        self._travel_km = None
+
+        # Las verificaciones de tipo solo corren en modo debug; al ejecutar
+        # con -O se eliminan por completo del constructor
+        if __debug__:
+            if not isinstance(inicio, Localizacion):
+                raise ValueError('El inicio debe ser una localización')
+            if not isinstance(final, Localizacion):
+                raise ValueError('El final debe ser una localización')
+            if not isinstance(paradas, (list, tuple)):
+                raise ValueError('Las paradas deben ser una lista')
+
+        self._inicio = inicio
+        self._final = final
+
+        # Tupla vacía por defecto: evita compartir una lista mutable entre
+        # instancias y es hasheable para las cachés
+        self._paradas = paradas or ()
+
+        # Si todas las paradas ya están resueltas, sus coordenadas se
+        # materializan una sola vez; procesar() y obtener_imagen() leen la
+        # tupla en vez de recorrer las paradas en cada llamada
+        if all(localizacion._latlng_recibido or localizacion._data_procesada
+               for localizacion in self._paradas):
+            self._paradas_coords = tuple(
+                _congelar_posicion(localizacion.obtener_latlng())
+                for localizacion in self._paradas)
         else:
-            raise ValueError('El final debe ser una localización')
-
-        if type(paradas) is list:
-            self._paradas = paradas
-        else:
-            raise ValueError('Las paradas deben ser una lista')
+            self._paradas_coords = None
 
         self._kwargs = kwargs
         self._map_service = map_service
 
+    @property
+    def _data_procesada(self):
+        """ Compatibilidad con el par de banderas anterior.
+
+        Returns:
+            bool: True si los datos ya fueron procesados.
+        """
+        return self._state >= _ST_DATA
+
+    @property
+    def _imagen_procesada(self):
+        """ Compatibilidad con el par de banderas anterior.
+
+        Returns:
+            bool: True si la imagen ya fue procesada.
+        """
+        return self._state >= _ST_IMG
+
+    @staticmethod
+    def _resolver_extremo(localizacion, rol):
+        """ Resuelve una localización de extremo (inicio o final) de la ruta
+            a su latitud y longitud o a su dirección. Centraliza el bloque
+            que antes estaba duplicado en procesar() y obtener_imagen().
+
+        Args:
+            localizacion (Localizacion): Localización a resolver.
+            rol (String): 'inicio' o 'final', usado en el mensaje de error.
+
+        Raises:
+            ValueError: Si la localización no tiene datos para resolver.
+
+        Returns:
+            (lat, lng) o String: Latitud y longitud o dirección.
+        """
+        if localizacion._latlng_recibido:
+            return localizacion.obtener_latlng()
+        if localizacion._direccion_recibida:
+            return localizacion.obtener_direccion()
+        raise ValueError(
+            f'La localización de {rol} no ha sido procesada, porfavor ejecutar método procesar()')
+
     def procesar(self):
         """ Procesa los datos de la Ruta.
 
@@ -802,33 +1415,29 @@ class Ruta(object):
         Returns:
             JSON: JSON con los datos de la ruta.
         """
-        if self._data_procesada:
+        if self._state >= _ST_DATA:
             raise ValueError('La localización ya ha sido procesada')
         else:
-            proc_inicio = None
-            proc_final = None
-            if self._inicio._latlng_recibido:
-                proc_inicio = self._inicio.obtener_latlng()
-            elif self._inicio._direccion_recibida:
-                proc_inicio = self._inicio.obtener_direccion()
-            else:
-                raise ValueError(
-                    'La localización de inicio no ha sido procesada, porfavor ejecutar método procesar()')
-
-            if self._final._latlng_recibido:
-                proc_final = self._final.obtener_latlng()
-            elif self._final._direccion_recibida:
-                proc_final = self._final.obtener_direccion()
-            else:
-                raise ValueError(
-                    'La localización de final no ha sido procesada, porfavor ejecutar método procesar()')
+            proc_inicio = self._resolver_extremo(self._inicio, 'inicio')
+            proc_final = self._resolver_extremo(self._final, 'final')
 
             try:
-                self.data = self._map_service._rest_ruta(proc_inicio, proc_final, [
-                    loc.obtener_latlng() for loc in self._paradas], **self._kwargs)
-                self._data_procesada = True
-            except:
-                raise ValueError('Error, al procesar REST')
+                self.data = _cached_rest_ruta(
+                    weakref.ref(self._map_service),
+                    _congelar_posicion(proc_inicio),
+                    _congelar_posicion(proc_final),
+                    self._paradas_coords if self._paradas_coords is not None
+                    else tuple(_congelar_posicion(loc.obtener_latlng())
+                               for loc in self._paradas),
+                    _congelar_kwargs(self._kwargs))
+                self._state = _ST_DATA
+                # Se cachea la distancia de viaje para que las consultas de
+                # distancia no repitan la búsqueda en el diccionario
+                self._travel_km = self.data.get('travelDistance')
+            except (requests.RequestException, KeyError, IndexError,
+                    ValueError) as e:
+                _LOG.exception('Error al procesar REST')
+                raise ValueError(f'Error al procesar REST: {e}') from e
 
         return self.data
 
@@ -838,7 +1447,9 @@ class Ruta(object):
 
     def distancia_geodesica_kilometros(self):
         """ Retorna la distancia geodesica en kilometros entre dos puntos.
-            Usando la librería geopy.distance.
+            Usando el kernel haversine de _geo_kernels (compilado con Numba
+            si está instalado); el error frente a la geodesica exacta de
+            geopy es inferior al 0.5 %.
 
         Returns:
             float: Distancia de la geodesica en kilometros entre los puntos dados.
@@ -847,7 +1458,55 @@ class Ruta(object):
             raise ValueError(
                 "Error, ejecutar el método procesar() en las localizaciones de la ruta")
         else:
-            return geodesic(self._inicio.obtener_latlng(), self._final.obtener_latlng()).km
+            lat1, lng1 = self._inicio.obtener_latlng()
+            lat2, lng2 = self._final.obtener_latlng()
+            return haversine_km(lat1, lng1, lat2, lng2)
+
+    @staticmethod
+    def matriz_distancias(localizaciones):
+        """ Retorna la matriz de distancias haversine en kilometros entre
+            todas las localizaciones dadas. Toda la matriz N×N se calcula en
+            una sola pasada vectorizada con NumPy (ver _geo_kernels), útil
+            para construir matrices de distancias o búsquedas de parada más
+            cercana sin una llamada de Python por cada par.
+
+        Args:
+            localizaciones (list<Localizacion>): Lista de localizaciones ya
+                procesadas o creadas con latitud y longitud.
+
+        Returns:
+            np.ndarray: Matriz (N, N) de distancias en kilometros.
+        """
+        puntos = [localizacion.obtener_latlng()
+                  for localizacion in localizaciones]
+        return pairwise_km(puntos)
+
+    def ordenar_paradas_nn(self):
+        """ Reordena las paradas con la heurística de vecino más cercano
+            antes de consultar a Bing Maps (ver nn_order en _geo_kernels).
+            Un orden corto de paradas reduce la distancia de la ruta sin
+            pagar el optimizeWaypoints de Bing, que cobra por parada.
+
+        Raises:
+            ValueError: Si la ruta ya ha sido procesada.
+
+        Returns:
+            tuple<Localizacion>: Las paradas en el nuevo orden.
+        """
+        if self._state >= _ST_DATA:
+            raise ValueError('La localización ya ha sido procesada')
+
+        if len(self._paradas) > 2:
+            puntos = [localizacion.obtener_latlng()
+                      for localizacion in self._paradas]
+            orden = nn_order(puntos)
+            self._paradas = tuple(self._paradas[i] for i in orden)
+            # Las coordenadas precomputadas se reordenan de la misma forma
+            self._paradas_coords = tuple(
+                _congelar_posicion(punto) for punto in
+                (puntos[i] for i in orden))
+
+        return self._paradas
 
     def distancia_ruta_bing_kilometros(self):
         """ Retorna la distancia de viaje en kilometros teniendo en cuenta la ruta.
@@ -857,9 +1516,9 @@ class Ruta(object):
         Returns:
             float: Distancia de la ruta en conducción en kilometros entre los puntos dados.
         """
-        if not self._data_procesada:
+        if self._state < _ST_DATA:
             self.procesar()
-        return self.data['travelDistance']
+        return self._travel_km
 
     def distancia_ruta_bing_metros(self):
         """ Retorna la distancia de viaje en metros teniendo en cuenta la ruta.
@@ -869,7 +1528,9 @@ class Ruta(object):
         Returns:
             float: Distancia de la ruta en conducción en metros entre los puntos dados.
         """
-        return self.distancia_ruta_bing_kilometros() * 1000
+        if self._state < _ST_DATA:
+            self.procesar()
+        return self._travel_km * 1000.0
 
     ################################################################################
     ############################### TIEMPOS VIAJE ##################################
@@ -900,7 +1561,7 @@ class Ruta(object):
         Returns:
             float: Tiempo de viaje en segundos entre los puntos dados.
         """
-        if not self._data_procesada:
+        if self._state < _ST_DATA:
             self.procesar()
         return self.data['travelDurationTraffic']
 
@@ -912,7 +1573,9 @@ class Ruta(object):
         Returns:
             float: Tiempo de viaje en minutos entre los puntos dados.
         """
-        return self.tiempo_de_viaje_segundos() / 60
+        if self._state < _ST_DATA:
+            self.procesar()
+        return self.data['travelDurationTraffic'] / 60
 
     ################################################################################
     ################################### OTROS ######################################
@@ -930,21 +1593,24 @@ class Ruta(object):
         Returns:
             List<String>: Lista de las indicaciones de la ruta.
         """
-        if not self._data_procesada:
+        if self._state < _ST_DATA:
             self.procesar()
-        # Se obtiene la lista de indicaciones
-        indicacioneItems = self.data["routeLegs"][0]["itineraryItems"]
-
-        indicaciones = []
-        for item in indicacioneItems:
-            texto = item["instruction"]["text"]
-            # Si se quieren traducir las indicaciones, se hace la traducción a español
-            if traducir:
-                self._translator = Translator()
-                texto = self._translator.translate(
-                    item["instruction"]["text"], src='en', dest='es').text
-            indicaciones.append(texto)
-            # print(texto)
+
+        # La lista de indicaciones se extrae una sola vez y se cachea en la
+        # instancia; las llamadas siguientes la devuelven sin recorrer el JSON
+        if self._indicaciones is None:
+            indicacioneItems = self.data["routeLegs"][0]["itineraryItems"]
+            self._indicaciones = [item["instruction"]["text"]
+                                  for item in indicacioneItems]
+        indicaciones = self._indicaciones
+
+        # Si se quieren traducir las indicaciones, se traducen todas en una
+        # sola llamada al traductor compartido en vez de una llamada por
+        # indicación
+        if traducir:
+            traducidas = _get_translator().translate(
+                indicaciones, src='en', dest='es')
+            indicaciones = [traduccion.text for traduccion in traducidas]
 
         return indicaciones
 
@@ -957,32 +1623,74 @@ class Ruta(object):
         Returns:
             String: URL de la imagen de la localización.
         """
-        if self._imagen_procesada:
+        if self._state >= _ST_IMG:
             return self._imagen
-        if not self._data_procesada:
+        if self._state < _ST_DATA:
             self.procesar()
-        proc_inicio = None
-        proc_final = None
-        if self._inicio._latlng_recibido:
-            proc_inicio = self._inicio.obtener_latlng()
-        elif self._inicio._direccion_recibida:
-            proc_inicio = self._inicio.obtener_direccion()
-        else:
-            raise ValueError(
-                'La localización de inicio no ha sido procesada, porfavor ejecutar método procesar()')
-
-        if self._final._latlng_recibido:
-            proc_final = self._final.obtener_latlng()
-        elif self._final._direccion_recibida:
-            proc_final = self._final.obtener_direccion()
-        else:
-            raise ValueError(
-                'La localización de final no ha sido procesada, porfavor ejecutar método procesar()')
+        proc_inicio = self._resolver_extremo(self._inicio, 'inicio')
+        proc_final = self._resolver_extremo(self._final, 'final')
 
         try:
-            self._imagen = self._map_service._rest_ruta_imagen(proc_inicio, proc_final, [
-                loc.obtener_latlng() for loc in self._paradas], **kwargs)
-            self._imagen_procesada = True
+            self._imagen = _cached_rest_ruta_imagen(
+                weakref.ref(self._map_service),
+                _congelar_posicion(proc_inicio),
+                _congelar_posicion(proc_final),
+                self._paradas_coords if self._paradas_coords is not None
+                else tuple(_congelar_posicion(loc.obtener_latlng())
+                           for loc in self._paradas),
+                _congelar_kwargs(kwargs))
+            self._state = _ST_IMG
             return self._imagen
-        except:
-            raise ValueError('Error, al procesar REST')
+        except (requests.RequestException, KeyError, IndexError,
+                ValueError) as e:
+            _LOG.exception('Error al procesar REST')
+            raise ValueError(f'Error al procesar REST: {e}') from e
+
+
+################################################################################
+########################### PROCESAMIENTO POR LOTES ############################
+################################################################################
+
+def procesar_rutas(rutas, max_workers=8):
+    """ Procesa en paralelo una lista de rutas.
+        Cada procesar() está limitado por la red, por lo que los hilos
+        liberan el GIL durante la espera y el tiempo total se acerca al de
+        una sola llamada en vez de crecer linealmente con la lista.
+
+    Args:
+        rutas (list<Ruta>): Lista de rutas a procesar.
+        max_workers (int, optional): Número máximo de hilos. Defaults to 8.
+
+    Returns:
+        list<JSON>: Lista de respuestas JSON, en el mismo orden de entrada.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futuros = [executor.submit(ruta.procesar) for ruta in rutas]
+
+        # Se espera a que terminen todas las rutas (as_completed propaga la
+        # primera excepción tan pronto ocurre)
+        for futuro in as_completed(futuros):
+            futuro.result()
+
+    return [futuro.result() for futuro in futuros]
+
+def procesar_localizaciones(localizaciones, max_workers=8):
+    """ Procesa en paralelo una lista de localizaciones.
+        Misma mecánica que procesar_rutas.
+
+    Args:
+        localizaciones (list<Localizacion>): Lista de localizaciones a procesar.
+        max_workers (int, optional): Número máximo de hilos. Defaults to 8.
+
+    Returns:
+        list<JSON>: Lista de respuestas JSON, en el mismo orden de entrada.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futuros = [executor.submit(localizacion.procesar)
+                   for localizacion in localizaciones]
+
+        # Se espera a que terminen todas las localizaciones
+        for futuro in as_completed(futuros):
+            futuro.result()
+
+    return [futuro.result() for futuro in futuros]